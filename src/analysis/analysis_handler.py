@@ -1,13 +1,12 @@
-import json
 import os
 from datetime import datetime
 
-import networkx as nx
-
 from src import PROJECT_PATH
 from src.core.flood_wave_extractor import FloodWaveExtractor
 from src.core.slope_calculator import SlopeCalculator
 from src.selection.selection import Selection
+from src.utils.graph_helper import GraphHelper
+from src.utils.vertex_helper import VertexHelper
 
 
 class AnalysisHandler:
@@ -17,7 +16,7 @@ class AnalysisHandler:
     def __init__(self, graph_whole: None, folder_name: str):
         self.folder_name = folder_name
         if graph_whole is None:
-            self.graph_whole = nx.read_gpickle("../whole_graph/joined_graph.gpickle")
+            self.graph_whole = GraphHelper.read(filepath="../whole_graph/joined_graph.npz")
         else:
             self.graph_whole = graph_whole
 
@@ -76,8 +75,8 @@ class AnalysisHandler:
         """
         gauges_dct = {}
         for gauge in gauges:
-            f = open(os.path.join(PROJECT_PATH, self.folder_name, "find_vertices", str(gauge) + ".json"))
-            read_dct = json.load(f)
+            read_dct = VertexHelper.read(os.path.join(PROJECT_PATH, self.folder_name, "find_vertices",
+                                                      str(gauge) + ".npz"), log=False)
 
             node_colors = [read_dct[i][1] for i in list(read_dct.keys()) if start_date <= i <= end_date]
             gauges_dct[str(gauge)] = node_colors
@@ -2,6 +2,7 @@ import networkx as nx
 
 from src.core.flood_wave_extractor import FloodWaveExtractor
 from src.selection.selection import Selection
+from src.selection.selection_handler import SelectionHandler
 
 
 class FloodMapCreator:
@@ -26,6 +27,10 @@ class FloodMapCreator:
         flood_map = nx.DiGraph()
         river_sections = [(x, y) for x, y in zip(river_section_stations, river_section_stations[1:])]
 
+        # The components of the graph and their gauges are computed once for all the sections
+        comps = list(nx.weakly_connected_components(self.joined_graph))
+        comp_ids_of_gauges = SelectionHandler.get_comp_ids_of_gauges(comps=comps)
+
         edges = []
         for section in river_sections:
             start_station = section[0]
@@ -35,7 +40,9 @@ class FloodMapCreator:
                 joined_graph=self.joined_graph,
                 start_station=start_station,
                 end_station=end_station,
-                sorted_stations=sorted_stations
+                sorted_stations=sorted_stations,
+                comps=comps,
+                comp_ids_of_gauges=comp_ids_of_gauges
             )
 
             extractor = FloodWaveExtractor(joined_graph=full_from_start_to_end)
@@ -1,4 +1,3 @@
-import json
 import os
 from datetime import datetime
 
@@ -11,6 +10,8 @@ from src.analysis.analysis_handler import AnalysisHandler
 from src.core.flood_wave_extractor import FloodWaveExtractor
 from src.data.dataloader import Dataloader
 from src.selection.selection import Selection
+from src.utils.graph_helper import GraphHelper
+from src.utils.json_helper import JsonHelper
 
 
 class StatisticalAnalysis:
@@ -19,7 +20,7 @@ class StatisticalAnalysis:
     """
     def __init__(self, folder_name: str):
         self.folder_name = folder_name
-        self.graph_whole = nx.read_gpickle("../whole_graph/joined_graph.gpickle")
+        self.graph_whole = GraphHelper.read(filepath="../whole_graph/joined_graph.npz")
 
     def yearly_mean_moving_average(self, length: int) -> list:
         """
@@ -150,8 +151,8 @@ class StatisticalAnalysis:
         table with the following statistics: minimums, maximums, means, medians and standard deviations
         :param int period: the results are accumulated for this many years
         """
-        f = open(os.path.join(PROJECT_PATH, self.folder_name, "find_edges", "vertex_pairs.json"))
-        vertex_pairs = json.load(f)
+        vertex_pairs = JsonHelper.read(os.path.join(PROJECT_PATH, self.folder_name, "find_edges", "vertex_pairs.json"),
+                                       log=False)
 
         years = np.arange(1876, 2020, period)
         dfs = []
@@ -272,8 +273,8 @@ class StatisticalAnalysis:
         """
         pair = str(start_station) + '_' + str(end_station)
 
-        f = open(os.path.join(PROJECT_PATH, self.folder_name, "find_edges", "vertex_pairs.json"))
-        vertex_pairs = json.load(f)
+        vertex_pairs = JsonHelper.read(os.path.join(PROJECT_PATH, self.folder_name, "find_edges", "vertex_pairs.json"),
+                                       log=False)
 
         if pair in list(vertex_pairs.keys()):
             current_dates = list(vertex_pairs[pair].keys())
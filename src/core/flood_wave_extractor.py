@@ -15,24 +15,43 @@ class FloodWaveExtractor:
         """
         self.joined_graph = joined_graph
         self.flood_waves = None
+        self.final_pairs = None
+        self.final_pairs_graph = None
+
+    def get_final_pairs(self) -> list:
+        """
+        This function collects the start and end nodes of the flood waves for every weakly connected component.
+        The result is kept until another graph is assigned to joined_graph, so the components and the degrees are
+        computed only once even if both get_flood_waves() and get_flood_waves_without_equivalence() are called.
+        The graph must not be modified in place in the meantime
+        :return list: list containing the start and end node pairs of each component
+        """
+        if self.final_pairs_graph is not self.joined_graph:
+            in_degrees = dict(self.joined_graph.in_degree())
+            out_degrees = dict(self.joined_graph.out_degree())
+            self.final_pairs = [
+                FloodWaveHandler.get_final_pairs(in_degrees=in_degrees, out_degrees=out_degrees, comp=comp)
+                for comp in nx.weakly_connected_components(self.joined_graph)
+            ]
+            self.final_pairs_graph = self.joined_graph
+
+        return self.final_pairs
 
     def get_flood_waves(self):
         """
         This function returns the actual flood waves in the graph
         :return list: list of lists of the flood wave nodes
         """
-        components = list(nx.weakly_connected_components(self.joined_graph))
-
         waves = []
-        for comp in components:
-            final_pairs = FloodWaveHandler.get_final_pairs(joined_graph=self.joined_graph, comp=list(comp))
-
+        for final_pairs in self.get_final_pairs():
+            # Only the start and end nodes of the waves are kept, so the reachable nodes are searched once for every
+            # start node
+            reachable = dict()
             for start, end in final_pairs:
-                try:
-                    wave = nx.shortest_path(self.joined_graph, start, end)
-                    waves.append((wave[0], wave[-1]))
-                except nx.NetworkXNoPath:
-                    continue
+                if start not in reachable:
+                    reachable[start] = nx.descendants(self.joined_graph, start)
+                if end in reachable[start]:
+                    waves.append((start, end))
 
         self.flood_waves = waves
 
@@ -42,12 +61,8 @@ class FloodWaveExtractor:
         start and end nodes it takes all paths between them)
         :return list: paths
         """
-        components = list(nx.weakly_connected_components(self.joined_graph))
-
         waves = []
-        for comp in components:
-            final_pairs = FloodWaveHandler.get_final_pairs(joined_graph=self.joined_graph, comp=list(comp))
-
+        for final_pairs in self.get_final_pairs():
             for start, end in final_pairs:
                 try:
                     wave = nx.all_shortest_paths(self.joined_graph, start, end)
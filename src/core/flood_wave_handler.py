@@ -1,6 +1,4 @@
-import itertools
-
-import networkx as nx
+import numpy as np
 
 
 class FloodWaveHandler:
@@ -9,26 +7,30 @@ class FloodWaveHandler:
     """
 
     @staticmethod
-    def get_final_pairs(joined_graph: nx.DiGraph, comp: list) -> list:
+    def get_final_pairs(in_degrees: dict, out_degrees: dict, comp: set) -> list:
         """
         Searches for end nodes of flood waves in a connected component
-        :param nx.DiGraph joined_graph: the graph
-        :param list comp: the component
+        :param dict in_degrees: in-degrees of the nodes of the graph
+        :param dict out_degrees: out-degrees of the nodes of the graph
+        :param set comp: the component
         :return list: list of start and end nodes of flood waves
         """
         possible_start_nodes = []
         possible_end_nodes = []
         for node in comp:
-            in_deg = joined_graph.in_degree(node)
-            out_deg = joined_graph.out_degree(node)
+            in_deg = in_degrees[node]
+            out_deg = out_degrees[node]
 
             if in_deg == 0:
                 possible_start_nodes.append(node)
             if out_deg == 0:
                 possible_end_nodes.append(node)
 
-        cartesian_pairs = list(itertools.product(possible_start_nodes, possible_end_nodes))
+        # A flood wave goes downstream, i.e. towards stations with smaller numbers
+        start_stations = np.array([float(node[0]) for node in possible_start_nodes], dtype=float)
+        end_stations = np.array([float(node[0]) for node in possible_end_nodes], dtype=float)
+        start_idx, end_idx = np.nonzero(start_stations[:, None] > end_stations[None, :])
 
-        final_pairs = [(x, y) for x, y in cartesian_pairs if float(x[0]) > float(y[0])]
+        final_pairs = [(possible_start_nodes[i], possible_end_nodes[j]) for i, j in zip(start_idx, end_idx)]
 
         return final_pairs
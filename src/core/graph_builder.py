@@ -1,6 +1,4 @@
-from copy import deepcopy
 import os
-from queue import LifoQueue
 
 import networkx as nx
 
@@ -18,11 +16,12 @@ class GraphBuilder:
     def __init__(self) -> None:
         self.vertex_pairs = {}
         self.gauge_pairs = []
+        self.gauge_pair_stations = []
         self.tree_g = nx.DiGraph()
         self.path = {}
         self.all_paths = {}
         self.wave_serial_number = 0
-        self.branches = LifoQueue()
+        self.branches = []
         self.component = {}
 
     @measure_time
@@ -39,6 +38,8 @@ class GraphBuilder:
             )
 
         self.gauge_pairs = list(self.vertex_pairs.keys())
+        # The station IDs of every gauge pair
+        self.gauge_pair_stations = [gauge_pair.split('_')[:2] for gauge_pair in self.gauge_pairs]
 
         for gauge_pair in self.gauge_pairs:
 
@@ -69,15 +70,14 @@ class GraphBuilder:
                     # Go over the missed branches, depth search
                     self.depth_first_search()
 
-                    # Save the wave
-
-                    data = nx.readwrite.json_graph.node_link_data(self.tree_g)
-                    JsonHelper.write(
-                        filepath=os.path.join(PROJECT_PATH, folder_name, 'build_graph',
-                                              f'{gauge_pair}/{actual_date}'),
-                        obj=data,
-                        log=False
-                    )
+                # Save the wave, the tree of the start date is complete after all of its next dates are searched
+                data = nx.readwrite.json_graph.node_link_data(self.tree_g)
+                JsonHelper.write(
+                    filepath=os.path.join(PROJECT_PATH, folder_name, 'build_graph',
+                                          f'{gauge_pair}/{actual_date}'),
+                    obj=data,
+                    log=False
+                )
 
     def depth_first_search(self) -> None:
         """
@@ -85,9 +85,9 @@ class GraphBuilder:
         If it reaches the end of a path, it goes back to the closest branching upwards,
         until we don't have any branch unmapped
         """
-        while self.branches.qsize() != 0:
+        while self.branches:
             # Get info from branches (info about the branch)
-            new_date, new_g_p_idx, path_key = self.branches.get()
+            new_date, new_g_p_idx, path_key = self.branches.pop()
             self.path = self.all_paths[path_key]
 
             # Go back to the branch
@@ -101,9 +101,10 @@ class GraphBuilder:
                           next_idx: int
                           ) -> None:
         """
-        Recursive function walking along the paths in the rooted tree representing the component
+        Function walking along the paths in the rooted tree representing the component
         We assume that global variable path contains the complete path up to the current state
         i.e. all nodes (=gauges) are stored before the call of create_components
+        The path is followed with a loop, the other branches are stored in a list used as a stack
 
         :param str next_gauge_date: The next date, we want to find in the next pair's json.
         A date from the list, not the key. Date after the branch
@@ -112,26 +113,33 @@ class GraphBuilder:
         """
 
         # other variables
-        max_index_value = len(self.vertex_pairs.keys()) - 1
-        next_gauge_pair = self.gauge_pairs[next_idx]
-        current_gauge = next_gauge_pair.split('_')[0]
-        next_gauge = next_gauge_pair.split('_')[1]
-        next_gauge_pair_dates = self.vertex_pairs[next_gauge_pair]
+        max_index_value = len(self.vertex_pairs) - 1
+
+        while True:
+            next_gauge_pair = self.gauge_pairs[next_idx]
+            current_gauge, next_gauge = self.gauge_pair_stations[next_idx]
+            next_gauge_pair_dates = self.vertex_pairs[next_gauge_pair]
 
-        # See if we continue the wave
-        can_path_be_continued = next_gauge_date in next_gauge_pair_dates.keys()
+            # See if we continue the wave
+            can_path_be_continued = next_gauge_date in next_gauge_pair_dates
 
-        if can_path_be_continued and next_idx < max_index_value:
+            if not (can_path_be_continued and next_idx < max_index_value):
+                # Update the 'map'. (Add the path to the start date)
+                self.component[f'id{self.wave_serial_number}'] = self.path
+
+                # Make possible to have more paths
+                self.wave_serial_number += 1
+                return
 
             # Get new date values
             new_date_value = next_gauge_pair_dates[next_gauge_date][0]
-            # the recursion continues with the first date
+            # the path continues with the first date
             new_gauge_date = new_date_value[0]
 
-            # we store the other possible dates for continuation in a LiFoQueue
+            # we store the other possible dates for continuation in the stack of branches
             if len(new_date_value) > 1:
 
-                # Save the information about the branches in a LiFoQueue (branches) so we can come back later.
+                # Save the information about the branches (branches) so we can come back later.
                 for k, date in enumerate(new_date_value[1:]):
                     self.save_info_about_branches(
                         current_gauge=current_gauge,
@@ -151,17 +159,8 @@ class GraphBuilder:
             )
 
             # Keep going, search for the path
-            self.create_components(
-                next_gauge_date=new_gauge_date,
-                next_idx=next_idx + 1
-            )
-        else:
-
-            # Update the 'map'. (Add the path to the start date)
-            self.component[f'id{self.wave_serial_number}'] = self.path
-
-            # Make possible to have more paths
-            self.wave_serial_number += 1
+            next_gauge_date = new_gauge_date
+            next_idx += 1
 
     def add_to_graph(self,
                      actual_date: str,
@@ -243,7 +242,7 @@ class GraphBuilder:
                                  ) -> None:
         """
         This ensures that we have a memory of the branches that we passed
-        We store information in a LiFoQueue (Last in First out)
+        We store information in a list used as a stack (Last in First out)
 
         :param str current_gauge: ID of the current station that we are at
         :param str date: The date of the branch (date of first node on the new branch)
@@ -253,7 +252,7 @@ class GraphBuilder:
         :param int next_idx: The index of the previous path
         """
         # TODO: Variable renaming
-        path_partial = deepcopy(self.path)  # copy result up to now
+        path_partial = self.path.copy()  # copy result up to now
         self.tree_g.add_edge(
             u_of_edge=(current_gauge, next_gauge_date),
             v_of_edge=(next_gauge, date)
@@ -261,7 +260,7 @@ class GraphBuilder:
         path_partial[next_gauge] = date  # update with the new node and the corresponding possible date
         new_path_key = "path" + str(next_idx + 1) + str(k)
         self.all_paths[new_path_key] = path_partial
-        self.branches.put([date, next_idx + 1, new_path_key])
+        self.branches.append([date, next_idx + 1, new_path_key])
 
     def update_path_status(self,
                            current_gauge: str,
@@ -1,10 +1,11 @@
+from functools import lru_cache
 import os
-from datetime import datetime
 
 import networkx as nx
-import pickle
+import numpy as np
 
 from src import PROJECT_PATH
+from src.utils.graph_helper import GraphHelper
 from src.utils.json_helper import JsonHelper
 
 
@@ -41,8 +42,7 @@ class GraphManipulation:
                 folder_name=folder_name
             )
 
-        with open("../whole_graph/joined_graph.gpickle", "wb") as f:
-            pickle.dump(joined_graph, f)
+        GraphHelper.write(filepath="../whole_graph/joined_graph.npz", graph=joined_graph)
 
     @staticmethod
     def compose_graph(
@@ -50,16 +50,22 @@ class GraphManipulation:
             gauge_pair: str,
             start_date: str,
             end_date: str,
-            folder_name: str
+            folder_name: str,
+            use_cache: bool = False
     ) -> nx.DiGraph:
         """
-        Combines graphs that are saved out individually with one that is given into one undirected graph
+        Combines graphs that are saved out individually with one that is given into one undirected graph.
+        The given graph is not modified, the result is a new graph (or the given one if there are no files to add).
+        The result is built in one batch, in the same node and adjacency order as composing the graphs of the files
+        one by one with nx.compose, since the order of the predecessors decides the ties of the shortest paths
 
         :param nx.Graph joined_graph: A graph to combine with the ones that are read from the files
         :param str gauge_pair: This gauge pair indicates the starting node of the graph
         :param str start_date: The first possible starting date for the graphs to be read
         :param str end_date: The last possible starting date for the graphs to be read
         :param str folder_name: Name of the folder to use for file handling.
+        :param bool use_cache: Whether to read the files through read_wave_cached(). It is worth it when the graphs
+                               of the same interval are composed several times.
         :return nx.Graph: The graph that was made by combining individually saved ones.
         """
 
@@ -70,15 +76,61 @@ class GraphManipulation:
             start=start_date,
             end=end_date
         )
+        if not sorted_files:
+            return joined_graph
+
+        # Collect the nodes and edges of all the files, then add them to a new graph at once
+        nodes = list(joined_graph.nodes())
+        edges = list(joined_graph.edges())
+        last_edges = []
         for file in sorted_files:
-            data = JsonHelper.read(
-                filepath=os.path.join(PROJECT_PATH, folder_name, 'build_graph',
-                                      f'{gauge_pair}', f'{file}'),
-                log=False
-            )
-            h = nx.readwrite.json_graph.node_link_graph(data)
-            joined_graph = nx.compose(joined_graph, h)
-        return joined_graph
+            filepath = os.path.join(PROJECT_PATH, folder_name, 'build_graph', f'{gauge_pair}', f'{file}')
+            if use_cache:
+                wave_nodes, wave_edges = GraphManipulation.read_wave_cached(filepath=filepath,
+                                                                            mtime=os.path.getmtime(filepath))
+            else:
+                wave_nodes, wave_edges = GraphManipulation.read_wave(filepath=filepath)
+            nodes.extend(wave_nodes)
+            edges.extend(last_edges)
+            last_edges = wave_edges
+
+        graph = nx.DiGraph()
+        graph.add_nodes_from(nodes)
+        # nx.compose rebuilds the graph with every file, so all the edges before the last file end up grouped by
+        # their source in the order of the nodes, and only the edges of the last file are appended after them
+        position = {node: idx for idx, node in enumerate(graph.nodes())}
+        graph.add_edges_from(sorted(edges, key=lambda edge: position[edge[0]]))
+        graph.add_edges_from(last_edges)
+        return graph
+
+    @staticmethod
+    @lru_cache(maxsize=4096)
+    def read_wave_cached(filepath: str, mtime: float) -> tuple:
+        """
+        Reads a wave with read_wave() and caches the result. The modification time of the file is part of the key,
+        so a file rewritten by GraphBuilder is read again
+
+        :param str filepath: The path of the wave file
+        :param float mtime: The modification time of the file
+        :return tuple: tuple of the nodes and tuple of the edges of the wave, in the order of nx.node_link_graph
+        """
+        return GraphManipulation.read_wave(filepath=filepath)
+
+    @staticmethod
+    def read_wave(filepath: str) -> tuple:
+        """
+        Reads the nodes and the edges of a wave saved by GraphBuilder
+
+        :param str filepath: The path of the wave file
+        :return tuple: tuple of the nodes and tuple of the edges of the wave, in the order of nx.node_link_graph
+        """
+        data = JsonHelper.read(filepath=filepath, log=False)
+        nodes = tuple(tuple(node['id']) for node in data['nodes'])
+        # The edges are ordered by their source in the order of the nodes, as the edges of the graph of the file
+        position = {node: idx for idx, node in enumerate(nodes)}
+        edges = tuple(sorted(((tuple(link['source']), tuple(link['target'])) for link in data['links']),
+                             key=lambda edge: position[edge[0]]))
+        return nodes, edges
 
     @staticmethod
     def sort_wave(
@@ -95,16 +147,10 @@ class GraphManipulation:
         :param str end: Final day of the interval.
         :return list filename_sort: List of filenames with waves in the given interval.
         """
-        start = datetime.strptime(start, '%Y-%m-%d')
-        end = datetime.strptime(end, '%Y-%m-%d')
-
-        filename_sort = []
-
-        for filename in filenames:
-            date_str = filename.split(".json")[0]
-            date_dt = datetime.strptime(date_str, '%Y-%m-%d')
+        # The filenames are '%Y-%m-%d' dates, which sort as strings in the same order as the dates
+        dates = np.array([filename.split(".json")[0] for filename in filenames], dtype=str)
+        is_in_interval = (dates >= start) & (dates <= end)
 
-            if start <= date_dt <= end:
-                filename_sort.append(filename)
+        filename_sort = [filename for filename, is_in in zip(filenames, is_in_interval) if is_in]
 
         return filename_sort
@@ -1,8 +1,7 @@
-import copy
 import itertools
-import json
 import os
-from datetime import datetime, timedelta
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import nullcontext
 from typing import Union
 
 import numpy as np
@@ -10,12 +9,13 @@ import pandas as pd
 
 from src import PROJECT_PATH
 from src.core.slope_calculator import SlopeCalculator
+from src.data.dataloader import Dataloader
 from src.data.flood_wave_data import FloodWaveData
 from src.core.preparation_handler import PreparationHandler
-from src.data.gauge_data import GaugeData
 from src.core.graph_builder import GraphBuilder
 from src.utils.json_helper import JsonHelper
 from src.utils.measure_time import measure_time
+from src.utils.vertex_helper import VertexHelper
 
 
 class GraphPreparation:
@@ -67,6 +67,10 @@ class GraphPreparation:
             self.end_date = end_date
         else:
             self.end_date = '2019-12-31'
+        self.saved_files = dict()
+        self.existing_files = dict()
+        self.files_to_write = dict()
+        self.time_series = dict()
 
     @measure_time
     def run(self) -> None:
@@ -75,7 +79,7 @@ class GraphPreparation:
         """
         self.mkdirs()
 
-        gauges_copy = copy.deepcopy(self.gauges)
+        gauges_copy = list(self.gauges)
 
         stations_life_intervals = JsonHelper.read(filepath=os.path.join(PROJECT_PATH,
                                                                         'data', 'existing_stations.json'))
@@ -85,104 +89,163 @@ class GraphPreparation:
                                                             intervals=stations_life_intervals,
                                                             gauges=self.gauges)
 
-        for i in range(len(cut_dates) - 1):
-            self.gauges = self.find_existing_gauges(start=cut_dates[i],
-                                                    end=cut_dates[i + 1],
-                                                    gauges_copy=gauges_copy,
-                                                    stations_life_intervals=stations_life_intervals)
+        # The worker processes are started once and used for all the cut intervals
+        with ProcessPoolExecutor() as executor:
+            for i in range(len(cut_dates) - 1):
+                self.gauges = self.find_existing_gauges(start=cut_dates[i],
+                                                        end=cut_dates[i + 1],
+                                                        gauges_copy=gauges_copy,
+                                                        stations_life_intervals=stations_life_intervals)
 
-            self.find_vertices()
-            self.find_edges()
+                self.find_vertices(executor=executor, write_files=False)
+                self.find_edges(write_files=False)
+
+        # Every file is written once, after all the cut intervals were processed
+        self.write_saved_files()
 
         # Set original values
         self.gauges = gauges_copy
         self.start_date = cut_dates[0]
         self.end_date = cut_dates[-1]
+        self.saved_files = dict()
+        self.existing_files = dict()
+        self.files_to_write = dict()
 
         GraphBuilder().build_graph(folder_name=self.folder_name)
 
     @measure_time
-    def find_vertices(self) -> None:
+    def find_vertices(self, executor: Union[ProcessPoolExecutor, None] = None, write_files: bool = True) -> None:
         """
         Creates a dictionary containing all the possible vertices for each station.
-        The end result is saved to 'PROJECT_PATH/generated/find_vertices' folder.
+        The end result is saved to 'PROJECT_PATH/generated/find_vertices' folder as compressed .npz files.
+        :param Union[ProcessPoolExecutor, None] executor: The executor running the search of the gauges. If it is not
+                                                          given, a new one is created for this call.
+        :param bool write_files: Whether to write the files at the end. If False, they are only written by
+                                 write_saved_files().
         :return:
         """
 
-        for gauge in self.gauges:
-            if not os.path.exists(os.path.join(PROJECT_PATH, self.folder_name,
-                                               'find_vertices', str(gauge), '.json')):
-                # Get gauge data and drop missing data and make it an array.
-                gauge_data = self.data.data[[str(gauge), 'Date']]\
-                                                 .loc[self.start_date:self.end_date].dropna()
-                   
-                gauge_ts = gauge_data[str(gauge)].to_numpy()
+        # The vertices of the gauges are searched in parallel
+        with ProcessPoolExecutor() if executor is None else nullcontext(executor) as executor:
+            futures = dict()
+            for gauge in self.gauges:
+                # Get gauge data without missing data. The dates are sorted, so the interval is found by binary search.
+                all_gauge_dates, all_gauge_ts = self.get_time_series(gauge=gauge)
+                start_idx = all_gauge_dates.searchsorted(self.start_date, side='left')
+                end_idx = all_gauge_dates.searchsorted(self.end_date, side='right')
+                gauge_ts = all_gauge_ts[start_idx:end_idx]
+                gauge_dates = all_gauge_dates[start_idx:end_idx]
+
                 if gauge_ts.shape[0] < (self.centered_window_radius + 1):
-                    JsonHelper.write(
-                        filepath=os.path.join(PROJECT_PATH, self.folder_name, 'find_vertices', f'{gauge}.json'),
-                        obj=dict()
-                    )
+                    self.save_or_update(obj=dict(), sub_folder="find_vertices", file=str(gauge))
                     print(f'No peaks found at {gauge}')
                     continue
-                # Get local peak/plateau values
-                local_peak_values = self.get_local_peak_values(gauge_ts=gauge_ts)
 
-                # Create keys for dictionary
-                candidate_vertices = self.find_local_maxima(
-                    gauge_data=gauge_data,
-                    local_peak_values=local_peak_values,
+                futures[gauge] = executor.submit(
+                    GraphPreparation.find_vertices_of_gauge,
+                    gauge_dates=gauge_dates,
+                    gauge_ts=gauge_ts,
+                    centered_window_radius=self.centered_window_radius,
+                    level_group=Dataloader.get_level_groups()[str(gauge)],
                     reg_number=str(gauge)
                 )
 
+            for gauge, future in futures.items():
                 # Save
-                self.save_or_update(obj=candidate_vertices, sub_folder="find_vertices", file=str(gauge))
+                self.save_or_update(obj=future.result(), sub_folder="find_vertices", file=str(gauge))
+
+        if write_files:
+            self.write_saved_files()
+
+    @staticmethod
+    def find_vertices_of_gauge(
+            gauge_dates: np.array,
+            gauge_ts: np.array,
+            centered_window_radius: int,
+            level_group: float,
+            reg_number: str
+    ) -> dict:
+        """
+        Finds the vertices of a single gauge. It depends only on its arguments, so it can run in a worker process.
+
+        :param np.array gauge_dates: The dates of the time series
+        :param np.array gauge_ts: The time series of the gauge without missing values
+        :param int centered_window_radius: The radius of the centered window used for finding the peaks
+        :param float level_group: level group number of the gauge
+        :param str reg_number: The gauge id
+        :return dict: dictionary of tuple of local max values and the date. (date: [value, color])
+        """
+        # Get local peak/plateau values
+        local_peak_values = GraphPreparation.get_local_peak_values(gauge_ts=gauge_ts,
+                                                                   centered_window_radius=centered_window_radius)
+
+        # Create keys for dictionary
+        return GraphPreparation.find_local_maxima(
+            gauge_dates=gauge_dates,
+            gauge_ts=gauge_ts,
+            local_peak_values=local_peak_values,
+            level_group=level_group,
+            reg_number=reg_number
+        )
 
     @measure_time
-    def find_edges(self) -> None:
+    def find_edges(self, write_files: bool = True) -> None:
         """
         Creates the wave-pairs for gauges next to each other.
-        Creates separate jsons and an actual_next_pair (super_dict) including all the pairs with all of their waves.
-        The end result is saved to 'PROJECT_PATH/generated/find_edges' folder.
+        Creates an actual_next_pair (super_dict) including all the pairs with all of their waves.
+        The end result is saved to 'PROJECT_PATH/generated/find_edges/vertex_pairs.json'.
+        :param bool write_files: Whether to write the files at the end. If False, they are only written by
+                                 write_saved_files().
         """
 
+        # Windows of the gauges in days
+        backward_windows = {gauge: np.timedelta64(int(days), 'D') for gauge, days in self.backward_dict.items()}
+        forward_windows = {gauge: np.timedelta64(int(days), 'D') for gauge, days in self.forward_dict.items()}
+
         vertex_pairs = {}
         for current_gauge, next_gauge in itertools.zip_longest(self.gauges[:-1], self.gauges[1:]):
-            # Read the data from the actual gauge.
-            current_gauge_candidate_vertices = PreparationHandler.read_vertex_file(gauge=current_gauge,
-                                                                                   folder_name=self.folder_name)
+            # Get the data of the actual gauge.
+            current_vertices = self.get_vertices(gauge=current_gauge)
+            current_gauge_candidate_vertices = PreparationHandler.convert_vertices_to_dataframe(
+                vertices=current_vertices)
 
-            # Read the data from the next gauge.
-            next_gauge_candidate_vertices = PreparationHandler.read_vertex_file(gauge=next_gauge,
-                                                                                folder_name=self.folder_name)
+            # Get the data of the next gauge.
+            next_vertices = self.get_vertices(gauge=next_gauge)
+            next_gauge_candidate_vertices = PreparationHandler.convert_vertices_to_dataframe(vertices=next_vertices)
 
             slope_calculator = SlopeCalculator(current_gauge=str(current_gauge),
                                                next_gauge=str(next_gauge),
-                                               folder_name=self.folder_name)
+                                               folder_name=self.folder_name,
+                                               current_vertices=current_vertices,
+                                               next_vertices=next_vertices)
+
+            current_dates = current_gauge_candidate_vertices['Date'].to_numpy(dtype='datetime64[D]')
+            next_dates = next_gauge_candidate_vertices['Date'].to_numpy(dtype='datetime64[D]')
+
+            # Find next dates for the following gauge
+            lower_bounds, upper_bounds = PreparationHandler.find_dates_for_next_gauge(
+                actual_dates=current_dates,
+                backward=backward_windows[current_gauge],
+                next_gauge_dates=next_dates,
+                forward=forward_windows[current_gauge]
+            )
+
+            # Calculate the slopes of the edges
+            current_idx, next_idx = PreparationHandler.get_edge_indices(lower_bounds=lower_bounds,
+                                                                        upper_bounds=upper_bounds)
+            slopes = slope_calculator.get_slopes_from_water_levels(
+                current_water_levels=current_gauge_candidate_vertices['Max value'].to_numpy()[current_idx],
+                next_water_levels=next_gauge_candidate_vertices['Max value'].to_numpy()[next_idx]
+            )
 
             # Create actual_next_pair
-            gauge_pair = dict()
-            for actual_date in current_gauge_candidate_vertices['Date']:
-                # Find next dates for the following gauge
-                next_gauge_dates = PreparationHandler.find_dates_for_next_gauge(
-                    actual_date=actual_date,
-                    backward=self.backward_dict[current_gauge],
-                    next_gauge_candidate_vertices=next_gauge_candidate_vertices,
-                    forward=self.forward_dict[current_gauge]
-                )
-
-                next_dates = next_gauge_dates['Date'].dt.strftime('%Y-%m-%d').tolist()
-                slopes = slope_calculator.get_slopes(current_date=actual_date, next_dates=next_dates)
-
-                # Convert datetime to string
-                PreparationHandler.convert_datetime_to_str(
-                    actual_date=actual_date,
-                    gauge_pair=gauge_pair,
-                    next_gauge_dates=next_gauge_dates,
-                    slopes=slopes
-                )
-
-            # Save to file
-            self.save_or_update(obj=gauge_pair, sub_folder="find_edges", file=f"{current_gauge}_{next_gauge}")
+            gauge_pair = PreparationHandler.create_gauge_pair(
+                actual_dates=current_gauge_candidate_vertices['DateStr'].tolist(),
+                next_dates=next_gauge_candidate_vertices['DateStr'].tolist(),
+                lower_bounds=lower_bounds,
+                upper_bounds=upper_bounds,
+                slopes=slopes
+            )
 
             # Store result for the all-in-one dict
             vertex_pairs[f'{current_gauge}_{next_gauge}'] = gauge_pair
@@ -191,6 +254,9 @@ class GraphPreparation:
         if not vertex_pairs == {}:
             self.save_or_update(obj=vertex_pairs, sub_folder="find_edges", file="vertex_pairs")
 
+        if write_files:
+            self.write_saved_files()
+
     @measure_time
     def mkdirs(self) -> None:
         """
@@ -201,61 +267,64 @@ class GraphPreparation:
         'PROJECT_PATH/generated_{folder_pf}/new/build_graph'
         """
 
-        os.makedirs(os.path.join(PROJECT_PATH, self.folder_name), exist_ok=True)
         os.makedirs(os.path.join(PROJECT_PATH, self.folder_name, 'find_vertices'), exist_ok=True)
         os.makedirs(os.path.join(PROJECT_PATH, self.folder_name, 'find_edges'), exist_ok=True)
         os.makedirs(os.path.join(PROJECT_PATH, self.folder_name, 'build_graph'), exist_ok=True)
         os.makedirs(os.path.join(PROJECT_PATH, self.folder_name, 'new', 'build_graph'), exist_ok=True)
 
+    @staticmethod
     @measure_time
-    def get_local_peak_values(self, gauge_ts: np.array) -> np.array:
+    def get_local_peak_values(gauge_ts: np.array, centered_window_radius: int) -> np.array:
         """
         Finds and flags all the values from the time series which have the highest value in a 5-day centered
-        time window which will be called peaks from now on, then converts the flagged time series to GaugeData
+        time window which will be called peaks from now on, then flags them in a boolean mask
         :param np.array gauge_ts: the time series of a station
-        :return np.array: numpy array containing the time series with the values flagged whether they are a peak or not
+        :param int centered_window_radius: the radius of the centered time window
+        :return np.array: boolean mask of the time series, True for the peaks
         """
-            
-        result = np.empty(gauge_ts.shape[0], dtype=GaugeData)
-        cond = np.r_[np.array([True] * gauge_ts.shape[0])]
-
-        for shift in range(1, (self.centered_window_radius + 1)):
-            left_cond = np.r_[np.array([False] * shift), gauge_ts[shift:] > gauge_ts[:-shift]]
-            right_cond = np.r_[gauge_ts[:-shift] >= gauge_ts[shift:], np.array([False] * shift)]
-            cond = left_cond & right_cond & cond   
-            
-        peaks = list(np.where(cond)[0])
-        
-        for idx, value in enumerate(gauge_ts):
-            result[idx] = GaugeData(value=value)
-        for k in peaks:
-            result[k].is_peak = True
-        return result
+
+        n = gauge_ts.shape[0]
+        radius = centered_window_radius
+        is_peak = np.zeros(n, dtype=bool)
+        if n <= 2 * radius:
+            return is_peak
+
+        # Only the values with a full window can be peaks. Every shift is compared on slices of the time series
+        # and combined in place
+        values = gauge_ts[radius:n - radius]
+        is_candidate = is_peak[radius:n - radius]
+        is_candidate[:] = True
+        for shift in range(1, (radius + 1)):
+            is_candidate &= values > gauge_ts[radius - shift:n - radius - shift]
+            is_candidate &= values >= gauge_ts[radius + shift:n - radius + shift]
+
+        return is_peak
 
     @staticmethod
     @measure_time
     def find_local_maxima(
-            gauge_data: pd.DataFrame,
+            gauge_dates: np.array,
+            gauge_ts: np.array,
             local_peak_values: np.array,
+            level_group: float,
             reg_number: str
             ) -> dict:
         """
         Returns with the list of found (date, peak/plateau value) tuples for a single gauge
 
-        :param pd.DataFrame gauge_data: One gauge column, one date column, date index
-        :param np.array local_peak_values: Array for local peak/plateau values.
+        :param np.array gauge_dates: The dates of the time series
+        :param np.array gauge_ts: The time series of the gauge
+        :param np.array local_peak_values: Boolean mask of the local peak/plateau values.
+        :param float level_group: level group number of the gauge
         :param str reg_number: The gauge id
         :return dict: dictionary of tuple of local max values and the date. (date: [value, color])
         """
 
-        g = open(os.path.join(PROJECT_PATH, "data", "level_groups_vegleges.json"))
-        level_groups = json.load(g)
-        level_group = level_groups[reg_number]
-
         # Clean-up dataframe for getting peak-plateau list
         peaks = PreparationHandler.clean_dataframe_for_getting_peak_list(
             local_peak_values=local_peak_values,
-            gauge_data=gauge_data,
+            gauge_dates=gauge_dates,
+            gauge_ts=gauge_ts,
             reg_number=reg_number
         )
 
@@ -278,29 +347,100 @@ class GraphPreparation:
         self.start_date = start
         self.end_date = end
 
-        exist = str(datetime.strptime(start, "%Y-%m-%d") + timedelta(days=1))
-        existing_gauges = []
-        for gauge in gauges_copy:
-            if stations_life_intervals[str(gauge)]["start"] <= exist <= stations_life_intervals[str(gauge)]["end"]:
-                existing_gauges.append(gauge)
+        exist = np.datetime64(start, 'D') + 1
+        starts = np.array([stations_life_intervals[str(gauge)]["start"] for gauge in gauges_copy],
+                          dtype='datetime64[D]')
+        ends = np.array([stations_life_intervals[str(gauge)]["end"] for gauge in gauges_copy],
+                        dtype='datetime64[D]')
+
+        # A gauge ending on the day after the start is not considered to exist in the period
+        is_existing = (starts <= exist) & (exist < ends)
+        existing_gauges = [gauges_copy[idx] for idx in np.flatnonzero(is_existing)]
 
         return existing_gauges
 
+    def get_time_series(self, gauge: str) -> tuple:
+        """
+        Returns the dates and the values of the time series of the given gauge without the missing values.
+        The arrays are created only once for every gauge and reused for all the cut intervals.
+        :param str gauge: the ID of the desired station
+        :return tuple: sorted array of the dates and array of the water levels
+        """
+        if gauge not in self.time_series:
+            gauge_ts = self.data.data[str(gauge)].to_numpy()
+            not_missing = pd.notna(gauge_ts)
+            self.time_series[gauge] = (self.data.data.index.to_numpy()[not_missing], gauge_ts[not_missing])
+
+        return self.time_series[gauge]
+
+    def get_vertices(self, gauge: str) -> dict:
+        """
+        Returns the vertices of the given gauge. The content of the vertex files saved during the run is kept in
+        memory, so the file is read only if it was not saved by this instance.
+        :param str gauge: the ID of the desired station
+        :return dict: the content of the vertex file of the gauge
+        """
+        file_helper, extension = GraphPreparation.get_file_helper(sub_folder='find_vertices')
+        filepath = os.path.join(PROJECT_PATH, self.folder_name, 'find_vertices', f'{gauge}.{extension}')
+        if filepath not in self.saved_files:
+            self.saved_files[filepath] = file_helper.read(filepath=filepath)
+
+        return self.saved_files[filepath]
+
+    @staticmethod
+    def get_file_helper(sub_folder: str) -> tuple:
+        """
+        Returns the helper class and the file extension used for the files of the given sub-folder.
+        The vertices are saved to compressed .npz files, everything else to .json files
+        :param str sub_folder: name of the sub-folder
+        :return tuple: the helper class (with read and write methods) and the file extension
+        """
+        if sub_folder == 'find_vertices':
+            return VertexHelper, 'npz'
+
+        return JsonHelper, 'json'
+
+    def get_existing_files(self, sub_folder: str) -> set:
+        """
+        Returns the names of the files in the given sub-folder. The folder is listed only once, so the existence of
+        the files is not checked one by one with separate system calls.
+        :param str sub_folder: name of the sub-folder
+        :return set: names of the files found in the sub-folder
+        """
+        if sub_folder not in self.existing_files:
+            with os.scandir(os.path.join(PROJECT_PATH, self.folder_name, sub_folder)) as entries:
+                self.existing_files[sub_folder] = {entry.name for entry in entries if entry.is_file()}
+
+        return self.existing_files[sub_folder]
+
     def save_or_update(self, obj: Union[dict, tuple, list], sub_folder: str, file: str):
         """
-        This method saves or updates files
+        This method saves or updates files. The merged content of every file is kept in self.saved_files,
+        so an existing file is never read back and re-parsed just to be updated. The files are written to disk
+        only by write_saved_files(), which is called once at the end of run(), or at the end of find_vertices() and
+        find_edges() when they are called on their own
         :param Union[dict, tuple, list] obj: object to be saved
         :param str sub_folder: name of the sub-folder
         :param str file: name of the file
         """
-        if not os.path.exists(os.path.join(PROJECT_PATH, self.folder_name, f'{sub_folder}', f'{file}.json')):
-            JsonHelper.write(
-                filepath=os.path.join(PROJECT_PATH, self.folder_name, f'{sub_folder}', f'{file}.json'),
-                obj=obj)
-        else:
-            read = JsonHelper.read(
-                filepath=os.path.join(PROJECT_PATH, self.folder_name, f'{sub_folder}', f'{file}.json'))
-            read.update(obj)
-            JsonHelper.write(
-                filepath=os.path.join(PROJECT_PATH, self.folder_name, f'{sub_folder}', f'{file}.json'),
-                obj=read)
+        file_helper, extension = GraphPreparation.get_file_helper(sub_folder=sub_folder)
+        filepath = os.path.join(PROJECT_PATH, self.folder_name, f'{sub_folder}', f'{file}.{extension}')
+        if filepath not in self.saved_files:
+            # Files from earlier runs are read only once, afterwards the merged content is kept in memory
+            self.saved_files[filepath] = dict()
+            existing_files = self.get_existing_files(sub_folder=sub_folder)
+            # Vertex files of earlier versions are .json files, file_helper.read() converts them
+            if f'{file}.{extension}' in existing_files or f'{file}.json' in existing_files:
+                self.saved_files[filepath] = file_helper.read(filepath=filepath)
+
+        self.saved_files[filepath].update(obj)
+        self.files_to_write[filepath] = file_helper
+
+    def write_saved_files(self) -> None:
+        """
+        Writes the files updated by save_or_update() to disk, each of them only once
+        """
+        for filepath, file_helper in sorted(self.files_to_write.items()):
+            file_helper.write(filepath=filepath, obj=self.saved_files[filepath])
+
+        self.files_to_write = dict()
@@ -1,11 +1,10 @@
 import os
 
-from datetime import datetime, timedelta
 import numpy as np
 import pandas as pd
 
 from src import PROJECT_PATH
-from src.utils.json_helper import JsonHelper
+from src.utils.vertex_helper import VertexHelper
 
 
 class PreparationHandler:
@@ -23,60 +22,91 @@ class PreparationHandler:
         :param str folder_name: Name of the folder to use for file handling.
         :return pd.DataFrame: A Dataframe with the peak value and date
         """
-        gauge_with_index = JsonHelper.read(os.path.join(PROJECT_PATH, folder_name,
-                                                        'find_vertices', f'{gauge}.json'))
-        list_with_index = [[i, gauge_with_index[i][0], gauge_with_index[i][1]] for i in list(gauge_with_index.keys())]
+        gauge_with_index = VertexHelper.read(os.path.join(PROJECT_PATH, folder_name,
+                                                          'find_vertices', f'{gauge}.npz'))
+        return PreparationHandler.convert_vertices_to_dataframe(vertices=gauge_with_index)
+
+    @staticmethod
+    def convert_vertices_to_dataframe(vertices: dict) -> pd.DataFrame:
+        """
+        Converts the vertices of a station (content of its vertex file) to a DataFrame sorted by date.
+        The original '%Y-%m-%d' keys are kept in the 'DateStr' column, so they need not be formatted again.
+
+        :param dict vertices: dictionary of [peak value, color] lists with date keys
+        :return pd.DataFrame: A Dataframe with the peak value and date
+        """
+        list_with_index = [[i, vertices[i][0], vertices[i][1]] for i in list(vertices.keys())]
         gauge_peaks = pd.DataFrame(data=list_with_index,
-                                   columns=['Date', 'Max value', 'Color'])
-        gauge_peaks['Date'] = pd.to_datetime(gauge_peaks['Date'])
-        return gauge_peaks
+                                   columns=['DateStr', 'Max value', 'Color'])
+        gauge_peaks.insert(0, 'Date', pd.to_datetime(gauge_peaks['DateStr'], format='%Y-%m-%d', cache=True))
+        return gauge_peaks.sort_values(by='Date', ignore_index=True)
 
     @staticmethod
     def find_dates_for_next_gauge(
-            actual_date: datetime,
-            backward: int,
-            next_gauge_candidate_vertices: pd.DataFrame,
-            forward: int
-    ) -> pd.DataFrame:
+            actual_dates: np.ndarray,
+            backward: np.timedelta64,
+            next_gauge_dates: np.ndarray,
+            forward: np.timedelta64
+    ) -> tuple:
         """
-        Searches for continuation of a component
-
-        :param datetime actual_date: The date of the last peak
-        :param int backward: The number of days allowed before a node for continuation (at a given gauge).
-                            This parameter is also called as alpha.
-        :param pd.DataFrame next_gauge_candidate_vertices: The time series of the subsequent station in a DataFrame
-        :param int forward: The number of days allowed after a node for continuation (at a given gauge).
-                            This parameter is also called as beta.
-        :return pd.DataFrame: A DataFrame containing the found dates
+        Searches for continuation of the components starting from all the given dates at once. Since the dates of
+        the subsequent station are sorted, the possible continuations of actual_dates[i] are exactly
+        next_gauge_dates[lower_bounds[i]:upper_bounds[i]], and the bounds are found by binary search.
+
+        :param np.ndarray actual_dates: The dates of the peaks at the current station (datetime64[D])
+        :param np.timedelta64 backward: The number of days allowed before a node for continuation
+                                      (at a given gauge). This parameter is also called as alpha.
+        :param np.ndarray next_gauge_dates: The sorted dates of the peaks at the subsequent station (datetime64[D])
+        :param np.timedelta64 forward: The number of days allowed after a node for continuation
+                                     (at a given gauge). This parameter is also called as beta.
+        :return tuple: arrays of the lower and upper bounds of the found dates
         """
 
-        dates = PreparationHandler.filter_for_start_and_length(
-            candidate_vertices=next_gauge_candidate_vertices,
-            date=actual_date,
-            forward_span=forward,
-            backward_span=backward
-        )
-        return dates
+        lower_bounds = np.searchsorted(next_gauge_dates, actual_dates - backward, side='left')
+        upper_bounds = np.searchsorted(next_gauge_dates, actual_dates + forward, side='right')
+        return lower_bounds, np.maximum(upper_bounds, lower_bounds)
 
     @staticmethod
-    def convert_datetime_to_str(
-            actual_date: datetime,
-            gauge_pair: dict,
-            next_gauge_dates: pd.DataFrame,
-            slopes
-    ) -> None:
+    def get_edge_indices(lower_bounds: np.ndarray, upper_bounds: np.ndarray) -> tuple:
         """
-        Converts the date(s) to our desired format string. Then the list of converted strings is stored in a dictionary
+        Flattens the bounds returned by find_dates_for_next_gauge() into the index pairs of all the edges
 
-        :param datetime actual_date: The date to be converted
-        :param dict gauge_pair: A dictionary to store the converted list of strings
-        :param pd.DataFrame next_gauge_dates: A DataFrame containing the found dates to be converted
-        :param slopes: slope or slopes between the two vertices
+        :param np.ndarray lower_bounds: lower bounds of the found dates
+        :param np.ndarray upper_bounds: upper bounds of the found dates
+        :return tuple: indices of the current vertices and indices of the next vertices of the edges
         """
+        counts = upper_bounds - lower_bounds
+        starts = np.cumsum(counts) - counts
+        current_idx = np.repeat(np.arange(counts.shape[0]), counts)
+        next_idx = np.arange(counts.sum()) - np.repeat(starts - lower_bounds, counts)
+        return current_idx, next_idx
 
-        if not next_gauge_dates.empty:
-            found_next_dates_str = next_gauge_dates['Date'].dt.strftime('%Y-%m-%d').tolist()
-            gauge_pair[actual_date.strftime('%Y-%m-%d')] = (found_next_dates_str, slopes)
+    @staticmethod
+    def create_gauge_pair(
+            actual_dates: list,
+            next_dates: list,
+            lower_bounds: np.ndarray,
+            upper_bounds: np.ndarray,
+            slopes: np.ndarray
+    ) -> dict:
+        """
+        Creates the dictionary of the edges between two stations: the found next dates and the slopes are stored
+        for each date of the current station that can be continued
+
+        :param list actual_dates: The dates of the current station as strings
+        :param list next_dates: The dates of the subsequent station as strings
+        :param np.ndarray lower_bounds: lower bounds of the found dates
+        :param np.ndarray upper_bounds: upper bounds of the found dates
+        :param np.ndarray slopes: slopes of all the edges in the order given by get_edge_indices()
+        :return dict: dictionary with (found next dates, slopes) values
+        """
+        gauge_pair = dict()
+        offset = 0
+        for actual_date, lower, upper in zip(actual_dates, lower_bounds, upper_bounds):
+            if upper > lower:
+                gauge_pair[actual_date] = (next_dates[lower:upper], slopes[offset:offset + upper - lower].tolist())
+                offset += upper - lower
+        return gauge_pair
 
     @staticmethod
     def get_peak_list(peaks: pd.DataFrame, level_group: float) -> dict:
@@ -86,67 +116,36 @@ class PreparationHandler:
         :param float level_group: level group number of the gauge
         :return dict: dictionary
         """
-        peak_tuples = peaks.to_records(index=True)
-        peak_list = [
-            tuple(x)
-            for x in peak_tuples
-        ]
-        peak_list_new = {}
-        for i in range(len(peak_list)):
-            if peak_list[i][1] < level_group:
-                color = "yellow"
-            else:
-                color = "red"
-            peak_list_new[peak_list[i][0]] = [peak_list[i][1], color]
+        values = peaks.iloc[:, 0].to_numpy()
+        colors = np.where(values < level_group, "yellow", "red")
+        peak_list_new = {
+            date: [value, color]
+            for date, value, color in zip(peaks.index.tolist(), values.tolist(), colors.tolist())
+        }
         return peak_list_new
 
     @staticmethod
     def clean_dataframe_for_getting_peak_list(
             local_peak_values: np.array,
-            gauge_data: pd.DataFrame,
+            gauge_dates: np.array,
+            gauge_ts: np.array,
             reg_number: str
     ) -> pd.DataFrame:
         """
         Creates a dataframe containing a given station's peaks with the desired date format and data type
 
-        :param np.array local_peak_values: The flagged time series of the desired station in a numpy array
-        :param pd.DataFrame gauge_data: The time series of the desired station in a DataFrame
+        :param np.array local_peak_values: Boolean mask of the peaks in the time series of the desired station
+        :param np.array gauge_dates: The dates of the time series of the desired station
+        :param np.array gauge_ts: The time series of the desired station
         :param str reg_number: The ID of the desired station
         :return pd.DataFrame: A DataFrame containing the given station's peaks with date index
         """
 
-        peaks = gauge_data.loc[np.array([x.is_peak for x in local_peak_values])]
-        peaks.info()
-        peaks.index = pd.to_datetime(peaks.index).strftime('%Y-%m-%d')
-        peaks.info()
-        peaks = peaks.drop(columns="Date")  # .set_index(peaks.index.strftime('%Y-%m-%d'))
+        peaks = pd.DataFrame(data={reg_number: gauge_ts[local_peak_values]}, index=gauge_dates[local_peak_values])
+        peaks.index = pd.to_datetime(peaks.index, format='%Y-%m-%d', cache=True).strftime('%Y-%m-%d')
         peaks[reg_number] = peaks[reg_number].astype(float)
         return peaks
 
-    @staticmethod
-    def filter_for_start_and_length(
-            candidate_vertices: pd.DataFrame,
-            date: datetime,
-            forward_span: int,
-            backward_span: int
-    ) -> pd.DataFrame:
-        """
-        Find possible follow-up dates for the component coming from the previous gauge
-
-        :param pd.DataFrame candidate_vertices: Dataframe to crop
-        :param datetime date: start date of the crop
-        :param int forward_span: number of days we allow for continuing
-        :param int backward_span: number of days we allow for delay
-        :return pd.DataFrame: Cropped dataframe with found next dates.
-        """
-
-        max_date = date + timedelta(days=forward_span)
-        min_date = date - timedelta(days=backward_span)
-        possible_dates = candidate_vertices[(candidate_vertices['Date'] >= min_date) &
-                                            (candidate_vertices['Date'] <= max_date)]
-
-        return possible_dates
-
     @staticmethod
     def get_dates_in_between(start_date: str, end_date: str, intervals: dict, gauges: list) -> list:
         """
@@ -159,13 +158,12 @@ class PreparationHandler:
         :return list: list of dates in-between start_date and end_date
         """
 
-        all_dates = [start_date, end_date]
+        all_dates = {start_date, end_date}
         for gauge in gauges:
-            x = intervals[str(gauge)]["start"]
-            y = intervals[str(gauge)]["end"]
-            all_dates = all_dates + [x] if x not in all_dates else all_dates
-            all_dates = all_dates + [y] if y not in all_dates else all_dates
-        all_dates.sort(key=lambda d: datetime.strptime(d, '%Y-%m-%d'))
+            all_dates.add(intervals[str(gauge)]["start"])
+            all_dates.add(intervals[str(gauge)]["end"])
+        # '%Y-%m-%d' strings sort in chronological order, so they are not parsed
+        all_dates = sorted(all_dates)
         cut_dates = [date for date in all_dates if start_date <= date <= end_date]
 
         return cut_dates
@@ -1,12 +1,13 @@
 import os
 from datetime import datetime
+from typing import Union
 
 import numpy as np
 import pandas as pd
 
 from src import PROJECT_PATH
 from src.data.dataloader import Dataloader
-from src.utils.json_helper import JsonHelper
+from src.utils.vertex_helper import VertexHelper
 
 
 class SlopeCalculator:
@@ -14,13 +15,20 @@ class SlopeCalculator:
     This class is responsible for calculating the slopes between given nodes that are connected by a directed
     path in the graph
     """
-    def __init__(self, current_gauge: str, next_gauge: str, folder_name: str):
+    def __init__(self,
+                 current_gauge: str,
+                 next_gauge: str,
+                 folder_name: str,
+                 current_vertices: dict = None,
+                 next_vertices: dict = None):
         """
         Constructor for SlopeCalculator class
 
         :param str current_gauge: station number of the current gauge as a string
         :param str next_gauge: station number of the next gauge as a string
         :param str folder_name: name of the generated data folder
+        :param dict current_vertices: vertices of the current gauge if they are already loaded, None otherwise
+        :param dict next_vertices: vertices of the next gauge if they are already loaded, None otherwise
         """
         self.current_vertices = None
         self.next_vertices = None
@@ -32,26 +40,34 @@ class SlopeCalculator:
 
         self.preprocess_for_get_slopes(current_gauge=current_gauge,
                                        next_gauge=next_gauge,
-                                       folder_name=folder_name)
+                                       folder_name=folder_name,
+                                       current_vertices=current_vertices,
+                                       next_vertices=next_vertices)
 
     def preprocess_for_get_slopes(self,
                                   current_gauge: str,
                                   next_gauge: str,
-                                  folder_name: str):
+                                  folder_name: str,
+                                  current_vertices: dict = None,
+                                  next_vertices: dict = None):
         """
         This is a helper function for get_slopes()
         :param str current_gauge: gauge number of current gauge as a string
         :param str next_gauge: gauge number of current gauge as a string
         :param str folder_name: name of the data folder as a string
+        :param dict current_vertices: vertices of the current gauge, read from its vertex file if None
+        :param dict next_vertices: vertices of the next gauge, read from its vertex file if None
         """
-        null_points = JsonHelper.read(os.path.join(PROJECT_PATH, 'data', 'nullpontok_fontos.json'))
+        null_points = Dataloader.get_null_points()
         current_null = null_points[current_gauge]
         next_null = null_points[next_gauge]
 
-        current_vertices = JsonHelper.read(os.path.join(PROJECT_PATH, folder_name,
-                                                        'find_vertices', f'{current_gauge}.json'))
-        next_vertices = JsonHelper.read(os.path.join(PROJECT_PATH, folder_name,
-                                                     'find_vertices', f'{next_gauge}.json'))
+        if current_vertices is None:
+            current_vertices = VertexHelper.read(os.path.join(PROJECT_PATH, folder_name,
+                                                              'find_vertices', f'{current_gauge}.npz'))
+        if next_vertices is None:
+            next_vertices = VertexHelper.read(os.path.join(PROJECT_PATH, folder_name,
+                                                           'find_vertices', f'{next_gauge}.npz'))
 
         current_river_km = self.river_kms[float(current_gauge)]
         next_river_km = self.river_kms[float(next_gauge)]
@@ -75,13 +91,23 @@ class SlopeCalculator:
         current_date = current_date.strftime("%Y-%m-%d")
 
         current_water_level = self.current_vertices[current_date][0]
-        next_water_levels = []
-        for next_date in next_dates:
-            next_water_levels.append(self.next_vertices[next_date][0])
-        next_water_levels = np.array(next_water_levels)
+        next_water_levels = np.fromiter((self.next_vertices[next_date][0] for next_date in next_dates),
+                                        dtype=float, count=len(next_dates))
 
-        level_diff = (next_water_levels + float(self.next_null)) - (current_water_level + float(self.current_null))
+        slopes = self.get_slopes_from_water_levels(current_water_levels=current_water_level,
+                                                   next_water_levels=next_water_levels)
 
-        slopes = level_diff / self.distance
+        return slopes.tolist()
 
-        return list(slopes)
+    def get_slopes_from_water_levels(self,
+                                     current_water_levels: Union[float, np.ndarray],
+                                     next_water_levels: np.ndarray) -> np.ndarray:
+        """
+        This function calculates the slopes in cm/km from the water levels of the vertices, element-wise
+        :param Union[float, np.ndarray] current_water_levels: water level(s) at the current gauge
+        :param np.ndarray next_water_levels: water levels at the next gauge
+        :return np.ndarray: slopes
+        """
+        level_diff = (next_water_levels + float(self.next_null)) - (current_water_levels + float(self.current_null))
+
+        return level_diff / self.distance
@@ -1,11 +1,20 @@
 from src import PROJECT_PATH
 
+from functools import lru_cache
 import os
 import gdown
+import numpy as np
 import pandas as pd
 
+from src.utils.graph_helper import GraphHelper
+from src.utils.json_helper import JsonHelper
+
 
 class Dataloader:
+    CHUNK_SIZE = 10000
+    # The version of the format of the cached data, it has to be increased when read_data returns a different DataFrame
+    CACHE_VERSION = 1
+
     def __init__(self, dataset_name: str = None):
         os.makedirs(os.path.join(PROJECT_PATH, 'data'), exist_ok=True)
         if dataset_name is None:
@@ -28,9 +37,14 @@ class Dataloader:
         if not os.path.exists(os.path.join(PROJECT_PATH, 'whole_graph')):
             os.makedirs(os.path.join(PROJECT_PATH, 'whole_graph'), exist_ok=True)
 
-        if not os.path.exists(os.path.join(PROJECT_PATH, 'whole_graph', 'joined_graph.gpickle')):
-            gdown.download(url="https://drive.google.com/uc?id=1GgorclNaFDazyF_gHAPnHysklKANBIan",
-                           output=os.path.join(PROJECT_PATH, 'whole_graph', 'joined_graph.gpickle'))
+        # The published graph is a pickle, it is converted to the .npz format read by the analysis classes
+        pickle_filepath = os.path.join(PROJECT_PATH, 'whole_graph', 'joined_graph.gpickle')
+        filepath = os.path.join(PROJECT_PATH, 'whole_graph', 'joined_graph.npz')
+        if not os.path.exists(filepath):
+            if not os.path.exists(pickle_filepath):
+                gdown.download(url="https://drive.google.com/uc?id=1GgorclNaFDazyF_gHAPnHysklKANBIan",
+                               output=pickle_filepath)
+            GraphHelper.convert_pickle(pickle_filepath=pickle_filepath, filepath=filepath)
 
     @staticmethod
     def do_all_files_exist() -> bool:
@@ -50,24 +64,85 @@ class Dataloader:
         return True
 
     @staticmethod
+    @lru_cache(maxsize=1)
     def get_metadata():
-        meta = pd.read_csv(os.path.join(PROJECT_PATH, 'data', 'meta_vegleges.csv'), index_col=0, sep=";") \
-            .groupby(["river"]) \
-            .get_group("Tisza") \
-            .sort_values(by='river_km', ascending=False)
+        """
+        This function reads the metadata of the gauges on the Tisza, sorted by river kilometers. The file is parsed
+        only once, subsequent calls return the cached DataFrame, so it must not be modified in place
+
+        :return pd.DataFrame: metadata of the gauges
+        """
+        meta = pd.read_csv(os.path.join(PROJECT_PATH, 'data', 'meta_vegleges.csv'), index_col=0, sep=";")
+        # Only the rows of the Tisza are needed
+        meta = meta[meta['river'].to_numpy() == 'Tisza'].sort_values(by='river_km', ascending=False)
         return meta
 
+    @staticmethod
+    @lru_cache(maxsize=1)
+    def get_level_groups() -> dict:
+        """
+        This function reads the level groups of the gauges. The file is parsed only once, subsequent calls
+        return the cached dictionary
+
+        :return dict: level group number for every gauge
+        """
+        return JsonHelper.read(filepath=os.path.join(PROJECT_PATH, 'data', 'level_groups_vegleges.json'), log=False)
+
+    @staticmethod
+    @lru_cache(maxsize=1)
+    def get_null_points() -> dict:
+        """
+        This function reads the null points of the gauges. The file is parsed only once, subsequent calls
+        return the cached dictionary
+
+        :return dict: null point for every gauge
+        """
+        return JsonHelper.read(filepath=os.path.join(PROJECT_PATH, 'data', 'nullpontok_fontos.json'), log=False)
+
     def read_data(self):
-        data = pd.read_csv(os.path.join(PROJECT_PATH, 'data', self.dataset_name + '.csv'), index_col=0, sep=";")
-        date = pd.to_datetime(data['Date']).dt.strftime('%Y-%m-%d')
+        filepath = os.path.join(PROJECT_PATH, 'data', self.dataset_name + '.csv')
+        cache_path = os.path.join(PROJECT_PATH, 'data', f'{self.dataset_name}.v{Dataloader.CACHE_VERSION}.pkl')
 
-        def isnumber(x):
+        # The cleaned data is cached next to the csv, it is reused while it is newer than the csv and the metadata.
+        # The cache is only an optimization, so the csv is parsed again if it cannot be read
+        source_mtime = max(os.path.getmtime(filepath),
+                           os.path.getmtime(os.path.join(PROJECT_PATH, 'data', 'meta_vegleges.csv')))
+        if os.path.exists(cache_path) and os.path.getmtime(cache_path) > source_mtime:
             try:
-                float(x)
-                return True
-            except:
-                return False
-        df = data[data.applymap(isnumber)]
-        df['Date'] = date
-        df = df.set_index(df['Date'])
+                return pd.read_pickle(cache_path)
+            except Exception:
+                # A damaged file can fail in many ways while it is unpickled
+                pass
+
+        # Only the dates and the gauges listed in the metadata are parsed, the header is read first to find them
+        columns = pd.read_csv(filepath, sep=";", nrows=0).columns
+        is_gauge = pd.to_numeric(columns.to_series(), errors='coerce').isin(self.meta.index.astype(float))
+        usecols = columns[(columns == 'Date') | is_gauge.to_numpy()]
+        # The file is parsed in chunks and every chunk is converted to numbers right away, so the raw string
+        # columns of only one chunk are kept in memory at a time
+        chunks = []
+        for data in pd.read_csv(filepath, sep=";", usecols=usecols, engine='c', chunksize=Dataloader.CHUNK_SIZE):
+            # The dates are parsed with the format of the published data first, other formats are inferred.
+            # They are formatted as '%Y-%m-%d' strings by NumPy
+            try:
+                date = pd.to_datetime(data['Date'], format='%Y-%m-%d', cache=True)
+            except ValueError:
+                date = pd.to_datetime(data['Date'], cache=True)
+            date = date.to_numpy().astype('datetime64[D]')
+            date = pd.Series(np.datetime_as_string(date, unit='D').astype(object), index=data.index, name='Date')
+
+            # Values which are not numbers become NaN, the columns are parsed by pandas column by column
+            chunk = data.drop(columns='Date').apply(pd.to_numeric, errors='coerce')
+            chunk.insert(data.columns.get_loc('Date'), 'Date', date)
+            chunks.append(chunk)
+
+        df = pd.concat(chunks)
+        date = df['Date']
+        df.index = pd.Index(date, name='Date')
+        if not df.index.is_monotonic_increasing:
+            df = df.sort_index()
+        try:
+            df.to_pickle(cache_path)
+        except OSError:
+            pass
         return df
@@ -5,7 +5,11 @@ class FloodWaveData:
     """This class gathers metadata in one place.
 
     Stores all the essential metadata and the Dataloader instance.
+    Dataloader instances are shared between FloodWaveData objects created with the same dataset name, so the
+    csv files are parsed only once per process.
     """
+    _dataloaders = {}
+
     def __init__(self, dataset_name: str = None):
         """
         Constructor for FloodWaveData class
@@ -13,7 +17,9 @@ class FloodWaveData:
         :param str dataset_name: name of the dataset file
         """
 
-        self.dataloader = Dataloader(dataset_name=dataset_name)
+        if dataset_name not in FloodWaveData._dataloaders:
+            FloodWaveData._dataloaders[dataset_name] = Dataloader(dataset_name=dataset_name)
+        self.dataloader = FloodWaveData._dataloaders[dataset_name]
         self.data = self.dataloader.data
         self.meta = self.dataloader.meta
         self.gauges = self.meta.dropna(subset=['h_table']).index.tolist()
@@ -1,7 +1,6 @@
 from datetime import datetime, timedelta
 from typing import Union
 import os
-import json
 
 import matplotlib.pyplot as plt
 import networkx as nx
@@ -11,6 +10,7 @@ import pandas as pd
 from src import PROJECT_PATH
 from src.data.flood_wave_data import FloodWaveData
 from src.utils.json_helper import JsonHelper
+from src.utils.vertex_helper import VertexHelper
 
 
 class Plotter:
@@ -60,8 +60,8 @@ class Plotter:
         """
         if add_isolated_nodes:
             for gauge in self.gauges:
-                nodes = JsonHelper.read(os.path.join(PROJECT_PATH, folder_name, 'find_vertices', str(gauge) + '.json'),
-                                        log=False)
+                nodes = VertexHelper.read(os.path.join(PROJECT_PATH, folder_name, 'find_vertices', str(gauge) + '.npz'),
+                                          log=False)
                 node_lst = []
                 for node in nodes:
                     if start_date <= node[0] <= end_date:
@@ -137,16 +137,25 @@ class Plotter:
         Creates coordinates for a given graph in order to be able to plot it on a grid
 
         :param nx.DiGraph joined_graph: The graph which to give coordinates for
-        :param datetime.strptime start: Starting date of the plot
+        :param datetime.strptime start: Starting date of the plot (midnight of the day)
         :param list gauges: The list of stations
         :return: A dictionary containing 'node: (x, y)' pairs
         """
 
         positions = dict()
 
-        for node in joined_graph.nodes():
-            x_coord = (datetime.strptime(node[1], '%Y-%m-%d') - start).days - 1
-            y_coord = len(gauges) - gauges.index(float(node[0]))
+        # The row of every station, the first occurrence is kept
+        gauge_index = dict()
+        for idx, gauge in enumerate(gauges):
+            gauge_index.setdefault(gauge, idx)
+
+        # The dates of all the nodes are parsed and subtracted from the start at once
+        nodes = list(joined_graph.nodes())
+        dates = np.array([node[1] for node in nodes], dtype='datetime64[D]')
+        x_coords = (dates - np.datetime64(start, 'D')).astype(np.int64) - 1
+
+        for node, x_coord in zip(nodes, x_coords.tolist()):
+            y_coord = len(gauges) - gauge_index[float(node[0])]
             positions[node] = (x_coord, y_coord)
         return positions
 
@@ -324,8 +333,8 @@ class Plotter:
         colors = [""] * len(self.positions)
         labels = {}
         for gauge in self.gauges:
-            f = open(os.path.join(PROJECT_PATH, folder_name, "find_vertices", str(gauge) + ".json"))
-            levels_dct = json.load(f)
+            levels_dct = VertexHelper.read(os.path.join(PROJECT_PATH, folder_name, "find_vertices",
+                                                        str(gauge) + ".npz"), log=False)
 
             for i in range(len(self.positions)):
                 if str(gauge) == list(self.positions.keys())[i][0]:
@@ -334,8 +343,6 @@ class Plotter:
                     labels[list(self.positions.keys())[i]] = int(water_level)
                     colors[i] = levels_dct[date][1]
 
-            f.close()
-
         nx.draw_networkx_labels(directed_graph, self.positions, labels=labels)
         nx.draw_networkx_nodes(directed_graph, self.positions, node_color=colors, node_size=800)
 
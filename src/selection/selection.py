@@ -1,9 +1,11 @@
-import copy
+from typing import Union
 
 import networkx as nx
+import numpy as np
 
 from src.core.flood_wave_extractor import FloodWaveExtractor
 from src.selection.selection_handler import SelectionHandler
+from src.utils.graph_helper import GraphHelper
 
 
 class Selection:
@@ -21,13 +23,18 @@ class Selection:
         :return nx.DiGraph: the selected subgraph
         """
 
-        graph_copy = copy.deepcopy(joined_graph)
-        nodes = graph_copy.nodes()
-        nodes_to_drop = []
-        for node in nodes:
-            if not start_date <= node[1] <= end_date:
-                nodes_to_drop.append(node)
+        nodes = list(joined_graph.nodes())
 
+        # The dates of the nodes are compared to the interval at once in an array
+        dates = np.array([node[1] for node in nodes], dtype=str)
+        is_outside = (dates < start_date) | (dates > end_date)
+        nodes_to_drop = [nodes[idx] for idx in np.flatnonzero(is_outside)]
+
+        # The nodes and the edges have no attributes, so the graph is rebuilt from them. The edges are added in an
+        # order which keeps the order of the successors and of the predecessors
+        graph_copy = nx.DiGraph()
+        graph_copy.add_nodes_from(nodes)
+        graph_copy.add_edges_from(GraphHelper.get_edge_order(graph=joined_graph))
         graph_copy.remove_nodes_from(nodes_to_drop)
 
         return graph_copy
@@ -36,7 +43,9 @@ class Selection:
     def select_only_in_interval(joined_graph: nx.DiGraph,
                                 start_station: str,
                                 end_station: str,
-                                sorted_stations: list) -> nx.DiGraph:
+                                sorted_stations: list,
+                                comps: Union[list, None] = None,
+                                comp_ids_of_gauges: Union[dict, None] = None) -> nx.DiGraph:
         """
         This function selects an interval of gauges. Each component's intersection with the given interval
         will be displayed.
@@ -45,25 +54,27 @@ class Selection:
         :param str start_station: first gauge of the interval as a string
         :param str end_station: last gauge of the interval as a string
         :param list sorted_stations: list of strings all station numbers in (numerically) decreasing order
+        :param Union[list, None] comps: the weakly connected components of joined_graph, if they are already computed.
+                                        Selecting several times from the same graph computes them only once this way.
+        :param Union[dict, None] comp_ids_of_gauges: the indices of comps for every gauge, if they are already computed
+                                                     by SelectionHandler.get_comp_ids_of_gauges(comps)
         :return nx.DiGraph: graph that contains only components that intersect with the interval
         """
 
         filtered = Selection.select_intersecting_with_interval(joined_graph=joined_graph,
                                                                start_station=start_station,
                                                                end_station=end_station,
-                                                               sorted_stations=sorted_stations)
-
-        comps = list(nx.weakly_connected_components(filtered))
+                                                               sorted_stations=sorted_stations,
+                                                               comps=comps,
+                                                               comp_ids_of_gauges=comp_ids_of_gauges)
 
-        gauges = SelectionHandler.get_gauges(comps=comps)
-
-        filtered_stations = sorted_stations[sorted_stations.index(start_station):sorted_stations.index(end_station) + 1]
+        filtered_stations = set(
+            sorted_stations[sorted_stations.index(start_station):sorted_stations.index(end_station) + 1]
+        )
 
-        stations_to_delete = [x for x in gauges if x not in filtered_stations]
-        nodes = copy.deepcopy(list(filtered.nodes()))
-        for node in nodes:
-            if any(node[0] == station for station in stations_to_delete):
-                filtered.remove_node(node)
+        # The nodes at the gauges outside the interval are deleted.
+        # filtered is a new graph, so its nodes are removed in place
+        filtered.remove_nodes_from([node for node in filtered.nodes() if node[0] not in filtered_stations])
 
         return filtered
 
@@ -71,7 +82,9 @@ class Selection:
     def select_intersecting_with_interval(joined_graph: nx.DiGraph,
                                           start_station: str,
                                           end_station: str,
-                                          sorted_stations: list) -> nx.DiGraph:
+                                          sorted_stations: list,
+                                          comps: Union[list, None] = None,
+                                          comp_ids_of_gauges: Union[dict, None] = None) -> nx.DiGraph:
         """
         This function selects for an interval of gauges. Any component intersecting with the interval will be displayed,
         otherwise deleted.
@@ -80,35 +93,32 @@ class Selection:
         :param str start_station: first gauge of the interval as a string
         :param str end_station: last gauge of the interval as a string
         :param list sorted_stations: list of strings all station numbers in (numerically) decreasing order
+        :param Union[list, None] comps: the weakly connected components of joined_graph, if they are already computed.
+                                        Selecting several times from the same graph computes them only once this way.
+        :param Union[dict, None] comp_ids_of_gauges: the indices of comps for every gauge, if they are already computed
+                                                     by SelectionHandler.get_comp_ids_of_gauges(comps)
         :return nx.DiGraph: graph that contains only components that intersect with the interval
         """
 
-        comps = list(nx.weakly_connected_components(joined_graph))
-        edges = joined_graph.edges()
-        comps_copy = comps.copy()
-        edges = list(edges)
+        # The indices refer to the order of comps, so they are only used together with the given components
+        if comps is None:
+            comps = list(nx.weakly_connected_components(joined_graph))
+            comp_ids_of_gauges = None
 
-        gauges = SelectionHandler.get_gauges(comps=comps)
+        if comp_ids_of_gauges is None:
+            comp_ids_of_gauges = SelectionHandler.get_comp_ids_of_gauges(comps=comps)
 
         filtered_stations = sorted_stations[sorted_stations.index(start_station):sorted_stations.index(end_station) + 1]
 
-        final_stations = list(set(gauges) & set(filtered_stations))
+        # A component is kept if it has a node at any gauge of the interval
+        kept_ids = set().union(*(comp_ids_of_gauges.get(station, ()) for station in filtered_stations))
+        nodes_to_keep = set().union(*(comps[idx] for idx in kept_ids))
 
-        comps_new = []
-        for comp in comps_copy:
-            list_of_bools = []
-            for station in final_stations:
-                x = SelectionHandler.is_gauge_in_comp(gauge=station, comp_list=list(comp))
-                list_of_bools.append(x)
-
-            if any(list_of_bools):
-                comps_new.append(comp)
-
-        nodes_filtered, edges_filtered = SelectionHandler.nodes_and_edges(comps=comps_new, edges=edges)
-
-        g = nx.DiGraph()
-        g.add_nodes_from(nodes_filtered)
-        g.add_edges_from(edges_filtered)
+        # Whole weakly connected components are kept, so removing the other nodes from a copy keeps all of their
+        # edges. The copy keeps the order of the nodes and of the successors, the predecessors are in the order of
+        # the edges
+        g = joined_graph.copy()
+        g.remove_nodes_from([node for node in joined_graph.nodes() if node not in nodes_to_keep])
 
         return g
 
@@ -144,29 +154,19 @@ class Selection:
         for x, y in start_end:
             waves.append(nx.shortest_path(G=joined_graph, source=x, target=y))
 
-        edges = joined_graph.edges()
-        waves_copy = waves.copy()
-        edges = list(edges)
-        for wave in waves_copy:
-            i_zero_list = []
-            gauge_in_comp = []
-            for i in wave:
-                i_zero_list.append(i[0])
-                if station == i[0]:
-                    gauge_in_comp.append(i)
-
-            if not any(station == elem for elem in i_zero_list):
-                waves.remove(wave)
-            else:
-                colors_of_gauge = []
-                for elem in gauge_in_comp:
-                    idx = list(positions.keys()).index(elem)
-                    colors_of_gauge.append(node_colors[idx])
-
-                if not any(c == color for color in colors_of_gauge):
-                    waves.remove(wave)
-
-        nodes_filtered, edges_filtered = SelectionHandler.nodes_and_edges(comps=waves, edges=edges)
+        # The nodes of the given color are selected by comparing all the colors at once, the colors are given
+        # in the order of positions
+        nodes = list(positions)
+        is_color = np.asarray(node_colors) == c
+        nodes_of_color = {nodes[idx] for idx in np.flatnonzero(is_color) if nodes[idx][0] == station}
+
+        # Keep the waves which have a node of the given color at the station
+        waves = [wave for wave in waves if not nodes_of_color.isdisjoint(wave)]
+
+        # Only the edges leaving the nodes of the kept waves are listed
+        nodes_in_waves = dict.fromkeys(node for wave in waves for node in wave)
+        nodes_filtered, edges_filtered = SelectionHandler.nodes_and_edges(comps=waves,
+                                                                          edges=joined_graph.out_edges(nodes_in_waves))
 
         g = nx.DiGraph()
         g.add_nodes_from(nodes_filtered)
@@ -178,29 +178,34 @@ class Selection:
     def select_components_from_start_to_end(joined_graph: nx.DiGraph,
                                             start_station: str,
                                             end_station: str,
-                                            sorted_stations: list) -> nx.DiGraph:
+                                            sorted_stations: list,
+                                            comps: Union[list, None] = None,
+                                            comp_ids_of_gauges: Union[dict, None] = None) -> nx.DiGraph:
         """
         This function selects those components that have nodes at both start_station and end_station
         :param nx.DiGraph joined_graph: the graph
         :param str start_station: the first station in the interval
         :param str end_station: the last station in the interval
         :param list sorted_stations: list of strings all station numbers in (numerically) decreasing order
+        :param Union[list, None] comps: the weakly connected components of joined_graph, if they are already computed.
+                                        Selecting several times from the same graph computes them only once this way.
+        :param Union[dict, None] comp_ids_of_gauges: the indices of comps for every gauge, if they are already computed
+                                                     by SelectionHandler.get_comp_ids_of_gauges(comps)
         :return nx.DiGraph: the selected graph
         """
         select_all_in_interval = Selection.select_only_in_interval(joined_graph=joined_graph,
                                                                    start_station=start_station,
                                                                    end_station=end_station,
-                                                                   sorted_stations=sorted_stations)
+                                                                   sorted_stations=sorted_stations,
+                                                                   comps=comps,
+                                                                   comp_ids_of_gauges=comp_ids_of_gauges)
 
-        components = nx.weakly_connected_components(select_all_in_interval)
+        components = list(nx.weakly_connected_components(select_all_in_interval))
 
+        # The nodes of a component are checked only until a node is found at the station
         selected = []
         for comp in components:
-            stations = []
-            for node in comp:
-                stations.append(node[0])
-
-            if any(start_station == elem for elem in stations) and any(end_station == elem for elem in stations):
+            if any(start_station == node[0] for node in comp) and any(end_station == node[0] for node in comp):
                 selected.append(comp)
 
         nodes = []
@@ -11,18 +11,27 @@ class SelectionHandler:
         :return list: decreasingly sorted gauge numbers
         """
 
-        for i in range(len(comps)):
-            comps[i] = list(comps[i])
-        nodes = [item for sublist in comps for item in sublist]
-
-        gauges = []
-        for node in nodes:
-            if node[0] not in gauges:
-                gauges.append(node[0])
+        gauges = {node[0] for comp in comps for node in comp}
         decreasing_gauges = sorted(gauges, key=lambda x: float(x), reverse=True)
 
         return decreasing_gauges
 
+    @staticmethod
+    def get_comp_ids_of_gauges(comps: list) -> dict:
+        """
+        This function collects the indices of the components which have a node at the gauge, for every gauge
+
+        :param list comps: list of components in the graph
+        :return dict: set of component indices for every gauge
+        """
+
+        comp_ids_of_gauges = dict()
+        for idx, comp in enumerate(comps):
+            for node in comp:
+                comp_ids_of_gauges.setdefault(node[0], set()).add(idx)
+
+        return comp_ids_of_gauges
+
     @staticmethod
     def remove_nodes(comps: list, gauges_to_delete: list) -> list:
         """
@@ -33,25 +42,22 @@ class SelectionHandler:
         :return list: remaining components
         """
 
-        comps_copy = comps.copy()
-        for comp in comps_copy:
-            comp_copy = comp.copy()
-            for elem in comp_copy:
-                if any(gtd == elem[0] for gtd in gauges_to_delete):
-                    comps[comps.index(comp)].remove(elem)
+        gauges_to_delete = set(gauges_to_delete)
+        for idx, comp in enumerate(comps):
+            comps[idx] = [elem for elem in comp if elem[0] not in gauges_to_delete]
         return comps
 
     @staticmethod
-    def is_gauge_in_comp(gauge: str, comp_list: list) -> bool:
+    def is_gauge_in_comp(gauge: str, comp_list) -> bool:
         """
         This function checks whether the weakly connected component comp_list has a node at gauge.
 
         :param str gauge: given gauge number as a string
-        :param list comp_list: given weakly connected component as a list
+        :param comp_list: given weakly connected component, as a set or a list
         :return bool: True if the gauge is in the component, False otherwise
         """
 
-        return any(gauge == elem for elem in [i[0] for i in [list(ele) for ele in comp_list]])
+        return any(gauge == elem[0] for elem in comp_list)
 
     @staticmethod
     def nodes_and_edges(comps: list, edges: list):
@@ -63,18 +69,10 @@ class SelectionHandler:
         :return: list of nodes and list of edges
         """
 
-        for i in range(len(comps)):
-            comps[i] = list(comps[i])
         nodes = [item for sublist in comps for item in sublist]
 
-        edges_to_keep = []
-        for edge in edges:
-            found_in_comp = False
-            for comp in comps:
-                if edge[0] in comp:
-                    found_in_comp = True
-                    break
-            if found_in_comp:
-                edges_to_keep.append(edge)
+        # An edge is kept if it starts from a kept node
+        nodes_to_keep = set(nodes)
+        edges_to_keep = [edge for edge in edges if edge[0] in nodes_to_keep]
 
         return nodes, edges_to_keep
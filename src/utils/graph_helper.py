@@ -0,0 +1,117 @@
+from collections import deque
+import os
+import pickle
+
+import networkx as nx
+import numpy as np
+
+
+class GraphHelper:
+    """This class is for saving and loading the joined graph.
+
+    The graph is stored as two compressed string arrays (the nodes and the edges) instead of a pickled nx.DiGraph,
+    since the nodes of the graph are (gauge, date) tuples without attributes. The repeated gauge ids and dates
+    compress well, and the graph is rebuilt from the arrays in one batch.
+    Graphs saved by earlier versions as joined_graph.gpickle are converted to the .npz format when they are read.
+    """
+    BUFFER_SIZE = 1 << 20
+
+    @staticmethod
+    def write(filepath: str, graph: nx.DiGraph, log: bool = True) -> None:
+        """
+        Writes the nodes and the edges of the given graph to a compressed .npz file
+
+        :param str filepath: The path to write to
+        :param nx.DiGraph graph: The graph to save
+        :param bool log: Boolean whether to print the log or not
+        """
+        if log:
+            print(f'Writing to file: {filepath}')
+        nodes = np.array(list(graph.nodes), dtype=str).reshape(-1, 2)
+        edges = np.array(GraphHelper.get_edge_order(graph=graph), dtype=str).reshape(-1, 2, 2)
+        with open(filepath, 'wb', buffering=GraphHelper.BUFFER_SIZE) as file:
+            np.savez_compressed(file, nodes=nodes, edges=edges)
+
+    @staticmethod
+    def get_edge_order(graph: nx.DiGraph) -> list:
+        """
+        Orders the edges so that adding them to a graph in this order restores both the order of the successors and
+        the order of the predecessors of every node, like unpickling the graph would. Every edge has to come after the
+        previous successor edge of its source and the previous predecessor edge of its target. Such an order exists
+        for graphs built by adding edges only; otherwise the order of graph.edges is kept, which keeps the successors
+
+        :param nx.DiGraph graph: The graph to save or to copy
+        :return list: list of the edges
+        """
+        edges = list(graph.edges)
+        blocking = dict.fromkeys(edges, 0)
+        followers = {edge: [] for edge in edges}
+        for is_succ, adjacency in ((True, graph.succ), (False, graph.pred)):
+            for node, neighbors in adjacency.items():
+                previous = None
+                for neighbor in neighbors:
+                    edge = (node, neighbor) if is_succ else (neighbor, node)
+                    if previous is not None:
+                        followers[previous].append(edge)
+                        blocking[edge] += 1
+                    previous = edge
+
+        ordered = []
+        ready = deque(edge for edge in edges if blocking[edge] == 0)
+        while ready:
+            edge = ready.popleft()
+            ordered.append(edge)
+            for follower in followers[edge]:
+                blocking[follower] -= 1
+                if blocking[follower] == 0:
+                    ready.append(follower)
+
+        return ordered if len(ordered) == len(edges) else edges
+
+    @staticmethod
+    def read(filepath: str, log: bool = True) -> nx.DiGraph:
+        """
+        Reads the graph saved by write() from the given path. If only a pickled graph of an earlier version exists
+        next to it (same name with .gpickle extension), that one is read and converted
+
+        :param str filepath: The path to read from
+        :param bool log: Boolean whether to print the log or not
+        :return nx.DiGraph: The rebuilt graph
+        """
+        if not os.path.exists(filepath):
+            pickle_filepath = os.path.splitext(filepath)[0] + '.gpickle'
+            if os.path.exists(pickle_filepath):
+                return GraphHelper.convert_pickle(pickle_filepath=pickle_filepath, filepath=filepath, log=log)
+
+        if log:
+            print(f'Reading from file: {filepath}')
+        with np.load(filepath) as data:
+            nodes = data['nodes'].tolist()
+            edges = data['edges'].tolist()
+
+        graph = nx.DiGraph()
+        graph.add_nodes_from(map(tuple, nodes))
+        graph.add_edges_from((tuple(source), tuple(target)) for source, target in edges)
+        return graph
+
+    @staticmethod
+    def convert_pickle(pickle_filepath: str, filepath: str, log: bool = True) -> nx.DiGraph:
+        """
+        Reads a graph pickled by earlier versions and saves it with write(). If the .npz file cannot be written,
+        the pickled graph is still returned
+
+        :param str pickle_filepath: The path of the pickled graph
+        :param str filepath: The path of the .npz file to write
+        :param bool log: Boolean whether to print the log or not
+        :return nx.DiGraph: The pickled graph
+        """
+        if log:
+            print(f'Converting file: {pickle_filepath}')
+        with open(pickle_filepath, 'rb') as file:
+            graph = pickle.load(file)
+
+        try:
+            GraphHelper.write(filepath=filepath, graph=graph, log=log)
+        except OSError:
+            pass
+        return graph
@@ -1,12 +1,21 @@
-from typing import Union
 import json
+from typing import Union
+
+import numpy as np
+import orjson
 
 
 class JsonHelper:
     """This class is for shrinking other classes.
 
     Since reading/writing from/to files is really common in this code base, using this class makes it tidier.
+    Files are read and written in one go through a large buffer, since some of them (e.g. vertex_pairs.json)
+    grow big. orjson is used for (de)serialization, it also handles numpy types.
+    orjson writes NaN as null and cannot read the NaN literal, so objects containing NaN are written and read with
+    the json module, which keeps the NaN values.
     """
+    BUFFER_SIZE = 1 << 20
+
     @staticmethod
     def write(filepath: str, obj: Union[dict, tuple, list], log: bool = True) -> None:
         """
@@ -19,8 +28,12 @@ class JsonHelper:
         """
         if log:
             print(f'Writing to file: {filepath}')
-        with open(filepath, 'w') as file:
-            json.dump(obj=obj, fp=file, indent=4)
+        data = orjson.dumps(obj, option=orjson.OPT_INDENT_2 | orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS)
+        if b'null' in data:
+            # The null values might be NaN values written by orjson
+            data = json.dumps(obj, indent=2, default=JsonHelper.convert_numpy).encode()
+        with open(filepath, 'wb', buffering=JsonHelper.BUFFER_SIZE) as file:
+            file.write(data)
 
     @staticmethod
     def read(filepath: str, log: bool = True):
@@ -33,5 +46,25 @@ class JsonHelper:
         """
         if log:
             print(f'Reading from file: {filepath}')
-        with open(filepath, 'r') as file:
-            return json.load(file)
+        with open(filepath, 'rb', buffering=JsonHelper.BUFFER_SIZE) as file:
+            data = file.read()
+
+        try:
+            return orjson.loads(data)
+        except orjson.JSONDecodeError:
+            # Files with NaN values
+            return json.loads(data)
+
+    @staticmethod
+    def convert_numpy(obj):
+        """
+        Converts the numpy arrays and scalars which the json module cannot serialize
+
+        :param obj: The object to convert
+        :return: The object as a list or as a Python scalar
+        """
+        if isinstance(obj, np.ndarray):
+            return obj.tolist()
+        if isinstance(obj, np.generic):
+            return obj.item()
+        raise TypeError(f'Object of type {type(obj).__name__} is not JSON serializable')
@@ -0,0 +1,78 @@
+import os
+
+import numpy as np
+
+from src.utils.json_helper import JsonHelper
+
+
+class VertexHelper:
+    """This class is for saving and loading the vertex files of the stations.
+
+    The vertices of a station ({date: [peak value, color]}) are stored as three compressed arrays instead of JSON:
+    the dates as datetime64[D], the peak values as float64 and the colors as strings. The vertices are returned
+    in the same dictionary form as they were given.
+    Vertex files saved by earlier versions as <gauge>.json are converted to the .npz format when they are read.
+    """
+    BUFFER_SIZE = 1 << 20
+
+    @staticmethod
+    def write(filepath: str, obj: dict, log: bool = True) -> None:
+        """
+        Writes the given vertices to a compressed .npz file
+
+        :param str filepath: The path to write to
+        :param dict obj: dictionary of [peak value, color] lists with date keys
+        :param bool log: Boolean whether to print the log or not
+        """
+        if log:
+            print(f'Writing to file: {filepath}')
+        dates = np.array(list(obj.keys()), dtype='datetime64[D]')
+        values = np.array([vertex[0] for vertex in obj.values()], dtype=np.float64)
+        colors = np.array([vertex[1] for vertex in obj.values()], dtype=str)
+        with open(filepath, 'wb', buffering=VertexHelper.BUFFER_SIZE) as file:
+            np.savez_compressed(file, dates=dates, values=values, colors=colors)
+
+    @staticmethod
+    def read(filepath: str, log: bool = True) -> dict:
+        """
+        Reads the vertices saved by write() from the given path. If the file does not exist, but a .json file
+        next to it (same name with .json extension), that one is read and converted
+
+        :param str filepath: The path to read from
+        :param bool log: Boolean whether to print the log or not
+        :return dict: dictionary of [peak value, color] lists with '%Y-%m-%d' date keys
+        """
+        if not os.path.exists(filepath):
+            json_filepath = os.path.splitext(filepath)[0] + '.json'
+            if os.path.exists(json_filepath):
+                return VertexHelper.convert_json(json_filepath=json_filepath, filepath=filepath, log=log)
+
+        if log:
+            print(f'Reading from file: {filepath}')
+        with np.load(filepath) as data:
+            dates = data['dates'].astype(str).tolist()
+            values = data['values'].tolist()
+            colors = data['colors'].tolist()
+
+        return {date: [value, color] for date, value, color in zip(dates, values, colors)}
+
+    @staticmethod
+    def convert_json(json_filepath: str, filepath: str, log: bool = True) -> dict:
+        """
+        Reads a vertex file saved as JSON by earlier versions and saves it with write(). If the .npz file cannot be
+        written, the vertices are still returned
+
+        :param str json_filepath: The path of the JSON vertex file
+        :param str filepath: The path of the .npz file to write
+        :param bool log: Boolean whether to print the log or not
+        :return dict: dictionary of [peak value, color] lists with '%Y-%m-%d' date keys
+        """
+        if log:
+            print(f'Converting file: {json_filepath}')
+        vertices = JsonHelper.read(filepath=json_filepath, log=False)
+
+        try:
+            VertexHelper.write(filepath=filepath, obj=vertices, log=log)
+        except OSError:
+            pass
+        return vertices